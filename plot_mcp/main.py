@@ -1,46 +1,231 @@
+import asyncio
 import os
+import re
 import click
-import datetime
+import multiprocessing
+import hashlib
+import threading
+import time
 import uuid
-from typing import Optional, Union
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Dict, List, Optional, Union
+import orjson
 from fastmcp import FastMCP
+from fastmcp.tools.tool import ToolResult
+from pydantic import ValidationError
 from .models import (
     LineParams, ScatterParams, BarParams, AreaParams,
     HistogramParams, BoxParams, HeatmapParams, ContourParams,
-    PieParams, PlotOutput
+    PieParams, BatchParams, PlotOutput
 )
 from .renderer import (
     render_line, render_scatter, render_bar, render_area,
     render_histogram, render_box, render_heatmap,
-    render_contour, render_pie
+    render_contour, render_pie, render_compressed, warm_up
 )
 
-mcp = FastMCP("PlotMCP")
+def serialize_result(data) -> str:
+    """Serialize tool results with orjson, which escapes large SVG strings much faster."""
+    return orjson.dumps(data, default=_model_dump, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+def _model_dump(obj):
+    # orjson calls this for types it can't serialize natively (PlotOutput,
+    # including those inside a plot_batch result list)
+    if isinstance(obj, PlotOutput):
+        return obj.model_dump()
+    raise TypeError
+
+def text_result(result: Union[PlotOutput, str]) -> ToolResult:
+    """Wrap a plot result as text content only.
+
+    FastMCP would otherwise also send a PlotOutput as structured content,
+    serialized a second time by pydantic, doubling the SVG in every response.
+    """
+    return ToolResult(content=result if isinstance(result, str) else serialize_result(result))
+
+mcp = FastMCP("PlotMCP", tool_serializer=serialize_result)
 
 # Global configuration for output directory
 OUTPUT_DIR: Optional[str] = None
+# OUTPUT_DIR with a trailing separator, so output paths are a single concatenation
+_OUTPUT_PREFIX: str = ""
 
-def save_svg_and_update_output(output: PlotOutput, tool_name: str, title: str = None):
-    """Save SVG to file and return formatted path if OUTPUT_DIR is configured, otherwise keep SVG content."""
+# "svg" renders, "data" returns the plot inputs without rendering,
+# "both" does both, "svgz" renders and gzips inline SVG
+RESPONSE_FORMAT: str = "svg"
+
+# Worker processes for concurrent (SSE/HTTP) transports; None renders in-process
+RENDER_POOL: Optional[ProcessPoolExecutor] = None
+# Under stdio, worker processes used only by plot_batch, started by the first
+# batch that is worth fanning out
+_BATCH_POOL: Optional[ProcessPoolExecutor] = None
+RENDER_WORKERS: Optional[int] = None
+_RENDER_POOL_LOCK = threading.Lock()
+
+_SLUG_RE = re.compile(r"[^A-Za-z0-9]")
+
+def output_path(tool_name: str, title: str = None) -> Optional[str]:
+    """Return the file a plot should be rendered into if OUTPUT_DIR is configured, otherwise None."""
     if not OUTPUT_DIR:
+        return None
+    
+    # Generate a filename (OUTPUT_DIR itself is created once at startup)
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    title_slug = _SLUG_RE.sub("_", (title or "")[:30])
+    # Always suffixed, so plots of the same type and title rendered in the
+    # same second never share (and overwrite) a file
+    suffix = uuid.uuid4().hex[:8]
+    filename = f"{tool_name}_{timestamp}_{title_slug}_{suffix}.svg" if title_slug else f"{tool_name}_{timestamp}_{suffix}.svg"
+    return _OUTPUT_PREFIX + filename
+
+def format_output(output: PlotOutput) -> Union[PlotOutput, str]:
+    """Return formatted path if the SVG was saved to a file, otherwise keep SVG content."""
+    if not output.svg_path:
         return output
     
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    # Return formatted string for client to parse and display
+    return f"```local_image\n{output.svg_path}\n```"
+
+# Rendering is a pure function of the params, so identical requests (common
+# while an agent iterates on a prompt) reuse the earlier result.
+_RENDER_CACHE: "OrderedDict[str, PlotOutput]" = OrderedDict()
+_RENDER_CACHE_LOCK = threading.Lock()
+_RENDER_CACHE_SIZE = 128
+# Inline results hold the whole SVG, so the cache is also bounded by the
+# total length of svg/svg_gz it keeps
+_RENDER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_render_cache_bytes = 0
+
+def _cached_size(res: PlotOutput) -> int:
+    return len(res.svg or "") + len(res.svg_gz or "")
+
+def _cache_store(key: str, res: PlotOutput):
+    """Add a result to the render cache, evicting the least recently used ones over either bound."""
+    global _render_cache_bytes
+    size = _cached_size(res)
+    with _RENDER_CACHE_LOCK:
+        old = _RENDER_CACHE.pop(key, None)
+        if old is not None:
+            _render_cache_bytes -= _cached_size(old)
+        if size > _RENDER_CACHE_MAX_BYTES:
+            # Would evict everything else and then itself
+            return
+        _RENDER_CACHE[key] = res
+        _render_cache_bytes += size
+        while len(_RENDER_CACHE) > _RENDER_CACHE_SIZE or _render_cache_bytes > _RENDER_CACHE_MAX_BYTES:
+            _, evicted = _RENDER_CACHE.popitem(last=False)
+            _render_cache_bytes -= _cached_size(evicted)
+
+def _cache_key(tool_name: str, params) -> str:
+    payload = orjson.dumps(
+        params.model_dump(),
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SORT_KEYS
+    )
+    prefix = f"{tool_name}\0{OUTPUT_DIR or ''}\0".encode()
+    return hashlib.blake2b(prefix + payload, digest_size=16).hexdigest()
+
+def plot_data(tool_name: str, params) -> Dict[str, Any]:
+    """Return the plot type and inputs for client-side rendering.
+
+    Array fields stay ndarrays; serialize_result writes them as JSON arrays
+    in the same pass as the rest of the response.
+    """
+    return {"type": tool_name, **params.model_dump()}
+
+def _new_render_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=RENDER_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=warm_up
+    )
+
+def _start_render_pool() -> ProcessPoolExecutor:
+    """Return the render worker pool, starting it if needed."""
+    global RENDER_POOL
+    with _RENDER_POOL_LOCK:
+        if RENDER_POOL is None:
+            RENDER_POOL = _new_render_pool()
+        return RENDER_POOL
+
+def _replace_broken_pool(pool: ProcessPoolExecutor):
+    """Drop a pool that lost a worker, so later requests don't all fail with BrokenProcessPool."""
+    global RENDER_POOL, _BATCH_POOL
+    with _RENDER_POOL_LOCK:
+        if pool is RENDER_POOL:
+            # The server keeps rendering in workers, so start a fresh pool now
+            RENDER_POOL = _new_render_pool()
+        elif pool is _BATCH_POOL:
+            # Started again by the next batch that needs it
+            _BATCH_POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+# Plot types rendered through matplotlib; the rest are built directly as SVG
+# in a few milliseconds, less than it takes to spawn workers
+_EXPENSIVE_TYPES = {"box"}
+
+def _batch_pool(types: List[str]) -> Optional[ProcessPoolExecutor]:
+    """Return the pool a batch of the given plot types should render in, or None for in-process."""
+    global _BATCH_POOL
+    if RESPONSE_FORMAT == "data" or len(types) < 2:
+        return None
+    if RENDER_POOL is not None:
+        return RENDER_POOL
+    with _RENDER_POOL_LOCK:
+        if _BATCH_POOL is None and _EXPENSIVE_TYPES.intersection(types):
+            _BATCH_POOL = _new_render_pool()
+        return _BATCH_POOL
+
+async def render_cached(tool_name: str, render, params, pool: Optional[ProcessPoolExecutor] = None) -> Union[PlotOutput, str]:
+    """Render params (or reuse an identical earlier render) and format the result.
+
+    Renders run in `pool` if given, else in RENDER_POOL if the server has one,
+    else in-process.
+    """
+    if RESPONSE_FORMAT == "data":
+        # The client renders the plot itself, so skip all SVG work
+        return PlotOutput(
+            data=plot_data(tool_name, params),
+            width=params.width,
+            height=params.height,
+            viewBox=f"0 0 {params.width} {params.height}"
+        )
     
-    # Generate a filename
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    title_slug = "".join(c if c.isalnum() else "_" for c in (title or ""))[:30]
-    filename = f"{tool_name}_{timestamp}_{title_slug or uuid.uuid4().hex[:8]}.svg"
-    filepath = os.path.join(OUTPUT_DIR, filename)
+    key = _cache_key(tool_name, params)
+    with _RENDER_CACHE_LOCK:
+        res = _RENDER_CACHE.get(key)
+        if res is not None:
+            _RENDER_CACHE.move_to_end(key)
     
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.write(output.svg or "")
+    # A saved file may have been removed since; render it again then
+    if res is None or (res.svg_path and not os.path.exists(res.svg_path)):
+        path = output_path(tool_name, params.title)
+        if RESPONSE_FORMAT == "svgz":
+            # Compressed as part of the render, so a worker sends back only the
+            # gzipped form and the event loop never gzips; cached compressed, so
+            # repeated requests don't gzip again
+            render = partial(render_compressed, render)
+        pool = pool or RENDER_POOL
+        if pool is None:
+            res = render(params, path)
+        else:
+            try:
+                res = await asyncio.get_running_loop().run_in_executor(pool, render, params, path)
+            except BrokenProcessPool as e:
+                # Typically a worker killed for running out of memory; only
+                # this request fails
+                _replace_broken_pool(pool)
+                raise RuntimeError("a render worker process died (out of memory?); the worker pool has been restarted") from e
+        _cache_store(key, res)
     
-    # Return formatted string for client to parse and display
-    return f"```local_image\n{filepath}\n```"
+    if RESPONSE_FORMAT == "both":
+        return res.model_copy(update={"data": plot_data(tool_name, params)})
+    return format_output(res)
 
 @mcp.tool()
-def plot_line(params: LineParams) -> Union[PlotOutput, str]:
+async def plot_line(params: LineParams) -> ToolResult:
     """Render one or more continuous 2D lines. Simple flat parameters - no nested objects!
     
     Example:
@@ -51,11 +236,10 @@ def plot_line(params: LineParams) -> Union[PlotOutput, str]:
         "height": 400
     }
     """
-    res = render_line(params)
-    return save_svg_and_update_output(res, "line", params.title)
+    return text_result(await render_cached("line", render_line, params))
 
 @mcp.tool()
-def plot_scatter(params: ScatterParams) -> Union[PlotOutput, str]:
+async def plot_scatter(params: ScatterParams) -> ToolResult:
     """Render discrete 2D points. Simple flat parameters - no nested objects!
     
     Example:
@@ -66,11 +250,10 @@ def plot_scatter(params: ScatterParams) -> Union[PlotOutput, str]:
         "color": "steelblue"
     }
     """
-    res = render_scatter(params)
-    return save_svg_and_update_output(res, "scatter", params.title)
+    return text_result(await render_cached("scatter", render_scatter, params))
 
 @mcp.tool()
-def plot_bar(params: BarParams) -> Union[PlotOutput, str]:
+async def plot_bar(params: BarParams) -> ToolResult:
     """Render categorical bar chart. Simple flat parameters - no nested objects!
     
     Example:
@@ -81,11 +264,10 @@ def plot_bar(params: BarParams) -> Union[PlotOutput, str]:
         "orientation": "vertical"
     }
     """
-    res = render_bar(params)
-    return save_svg_and_update_output(res, "bar", params.title)
+    return text_result(await render_cached("bar", render_bar, params))
 
 @mcp.tool()
-def plot_area(params: AreaParams) -> Union[PlotOutput, str]:
+async def plot_area(params: AreaParams) -> ToolResult:
     """Render filled area under a curve. Simple flat parameters - no nested objects!
     
     Example:
@@ -96,11 +278,10 @@ def plot_area(params: AreaParams) -> Union[PlotOutput, str]:
         "fill_color": "steelblue"
     }
     """
-    res = render_area(params)
-    return save_svg_and_update_output(res, "area", params.title)
+    return text_result(await render_cached("area", render_area, params))
 
 @mcp.tool()
-def plot_histogram(params: HistogramParams) -> Union[PlotOutput, str]:
+async def plot_histogram(params: HistogramParams) -> ToolResult:
     """Render 1D histogram. Simple flat parameters - no nested objects!
     
     Example:
@@ -110,11 +291,10 @@ def plot_histogram(params: HistogramParams) -> Union[PlotOutput, str]:
         "title": "Histogram"
     }
     """
-    res = render_histogram(params)
-    return save_svg_and_update_output(res, "histogram", params.title)
+    return text_result(await render_cached("histogram", render_histogram, params))
 
 @mcp.tool()
-def plot_box(params: BoxParams) -> Union[PlotOutput, str]:
+async def plot_box(params: BoxParams) -> ToolResult:
     """Render box plot from raw values. Simple flat parameters - no nested objects!
     
     Example:
@@ -126,11 +306,10 @@ def plot_box(params: BoxParams) -> Union[PlotOutput, str]:
         "title": "Box Plot"
     }
     """
-    res = render_box(params)
-    return save_svg_and_update_output(res, "box", params.title)
+    return text_result(await render_cached("box", render_box, params))
 
 @mcp.tool()
-def plot_heatmap(params: HeatmapParams) -> Union[PlotOutput, str]:
+async def plot_heatmap(params: HeatmapParams) -> ToolResult:
     """Render 2D matrix as color grid. Simple flat parameters - no nested objects!
     
     Example:
@@ -141,11 +320,10 @@ def plot_heatmap(params: HeatmapParams) -> Union[PlotOutput, str]:
         "title": "Heatmap"
     }
     """
-    res = render_heatmap(params)
-    return save_svg_and_update_output(res, "heatmap", params.title)
+    return text_result(await render_cached("heatmap", render_heatmap, params))
 
 @mcp.tool()
-def plot_contour(params: ContourParams) -> Union[PlotOutput, str]:
+async def plot_contour(params: ContourParams) -> ToolResult:
     """Render 2D contour lines from grid data. Simple flat parameters - no nested objects!
     
     Example:
@@ -156,11 +334,10 @@ def plot_contour(params: ContourParams) -> Union[PlotOutput, str]:
         "title": "Contour Plot"
     }
     """
-    res = render_contour(params)
-    return save_svg_and_update_output(res, "contour", params.title)
+    return text_result(await render_cached("contour", render_contour, params))
 
 @mcp.tool()
-def plot_pie(params: PieParams) -> Union[PlotOutput, str]:
+async def plot_pie(params: PieParams) -> ToolResult:
     """Render circular pie chart. Simple flat parameters - no nested objects!
     
     Example:
@@ -170,25 +347,81 @@ def plot_pie(params: PieParams) -> Union[PlotOutput, str]:
         "title": "Pie Chart"
     }
     """
-    res = render_pie(params)
-    return save_svg_and_update_output(res, "pie", params.title)
+    return text_result(await render_cached("pie", render_pie, params))
+
+# Parameter model and renderer for each plot type, used by plot_batch
+_PLOT_TYPES = {
+    "line": (LineParams, render_line),
+    "scatter": (ScatterParams, render_scatter),
+    "bar": (BarParams, render_bar),
+    "area": (AreaParams, render_area),
+    "histogram": (HistogramParams, render_histogram),
+    "box": (BoxParams, render_box),
+    "heatmap": (HeatmapParams, render_heatmap),
+    "contour": (ContourParams, render_contour),
+    "pie": (PieParams, render_pie),
+}
+
+# No output schema, so the result list is sent once as text rather than
+# also being repeated as structured content
+@mcp.tool(output_schema=None)
+async def plot_batch(params: BatchParams) -> List[Union[PlotOutput, str]]:
+    """Render several independent plots (e.g. a dashboard) in one call, in parallel.
+    Each item takes the same parameters as the matching plot_* tool.
+    Results are returned in the order of the items.
+    
+    Example:
+    {
+        "items": [
+            {"type": "bar", "params": {"categories": ["A", "B"], "values": [3, 5]}},
+            {"type": "pie", "params": {"labels": ["A", "B"], "values": [30, 70]}}
+        ]
+    }
+    """
+    # Validate every item before rendering any of them
+    item_params = []
+    for i, item in enumerate(params.items):
+        try:
+            item_params.append(_PLOT_TYPES[item.type][0].model_validate(item.params))
+        except ValidationError as e:
+            raise ValueError(f"items[{i}] ({item.type}): {e}") from None
+    pool = _batch_pool([item.type for item in params.items])
+    return list(await asyncio.gather(*(
+        render_cached(item.type, _PLOT_TYPES[item.type][1], p, pool)
+        for item, p in zip(params.items, item_params)
+    )))
 
 @click.command()
 @click.option("--output-dir", type=click.Path(), help="Directory to save generated SVG files.")
 @click.option("--transport", type=click.Choice(["stdio", "sse", "streamable-http"]), default="stdio", help="Transport type.")
 @click.option("--port", type=int, default=8000, help="Port for SSE/HTTP transport.")
-def main(output_dir: Optional[str], transport: str, port: int):
-    global OUTPUT_DIR
+@click.option("--response-format", type=click.Choice(["svg", "svgz", "data", "both"]), default="svg", help="Return rendered SVG, gzip-compressed SVG, the plot data as JSON, or both SVG and data.")
+@click.option("--workers", type=click.IntRange(min=1), default=None, help="Render worker processes for SSE/HTTP transport and plot_batch (default: CPU count).")
+def main(output_dir: Optional[str], transport: str, port: int, response_format: str, workers: Optional[int]):
+    global OUTPUT_DIR, _OUTPUT_PREFIX, RESPONSE_FORMAT, RENDER_WORKERS
+    RESPONSE_FORMAT = response_format
+    RENDER_WORKERS = workers
     if output_dir:
         OUTPUT_DIR = os.path.abspath(output_dir)
         os.makedirs(OUTPUT_DIR, exist_ok=True)
+        _OUTPUT_PREFIX = os.path.join(OUTPUT_DIR, "")
+    
+    # stdio serves one request at a time; the other transports can receive
+    # concurrent requests, which are rendered in parallel worker processes
+    if transport != "stdio":
+        _start_render_pool()
     
-    if transport == "stdio":
-        mcp.run(transport="stdio")
-    elif transport == "sse":
-        mcp.run(transport="sse", port=port)
-    elif transport == "streamable-http":
-        mcp.run(transport="streamable-http", port=port)
+    try:
+        if transport == "stdio":
+            mcp.run(transport="stdio")
+        elif transport == "sse":
+            mcp.run(transport="sse", port=port)
+        elif transport == "streamable-http":
+            mcp.run(transport="streamable-http", port=port)
+    finally:
+        for pool in (RENDER_POOL, _BATCH_POOL):
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,45 @@
-from typing import List, Literal, Optional
-from pydantic import BaseModel, Field
+from typing import Annotated, Any, Dict, List, Literal, Optional
+import numpy as np
+from pydantic import BaseModel, Field, PlainSerializer, WrapValidator, model_validator
+
+# --- Numeric payloads ---
+# Large numeric fields are converted to a float64 ndarray in one numpy call
+# instead of letting pydantic validate every element. The declared list type
+# is kept so the tool's JSON schema is unchanged.
+
+def _contains_none(value) -> bool:
+    return any(_contains_none(v) if isinstance(v, (list, tuple)) else v is None for v in value)
+
+def _float_array(ndim: int):
+    def validate(value, handler):
+        try:
+            arr = np.asarray(value, dtype=np.float64)
+        except (TypeError, ValueError):
+            # Raised as ValueError so pydantic reports a validation error
+            raise ValueError(f"expected a {ndim}-dimensional array of numbers") from None
+        if arr.ndim != ndim:
+            raise ValueError(f"expected a {ndim}-dimensional array of numbers")
+        # Python callers may pass a strided view (e.g. a[::2]), which orjson
+        # can't serialize; checked after ndim, as this would turn a scalar into
+        # a 1-d array
+        arr = np.ascontiguousarray(arr)
+        # numpy turns None (JSON null) into NaN, which List[float] rejected;
+        # only look for it when there is a NaN at all
+        if not isinstance(value, np.ndarray) and np.isnan(arr).any() and _contains_none(value):
+            raise ValueError("expected numbers, got null")
+        return arr
+    return validate
+
+def _serialize_array(arr, info):
+    # Lists for JSON, the array itself for model_dump() (orjson handles ndarray)
+    return arr.tolist() if info.mode_is_json() else arr
+
+FloatVector = Annotated[List[float], WrapValidator(_float_array(1)), PlainSerializer(_serialize_array)]
+FloatMatrix = Annotated[List[List[float]], WrapValidator(_float_array(2)), PlainSerializer(_serialize_array)]
+
+def _check_same_length(a, b, message: str):
+    if len(a) != len(b):
+        raise ValueError(message)
 
 # --- Simple, Flat Models for Each Tool ---
 
@@ -7,8 +47,13 @@ from pydantic import BaseModel, Field
 class LineSeries(BaseModel):
     """A single line series with name and data points"""
     name: str
-    x: List[float]
-    y: List[float]
+    x: FloatVector
+    y: FloatVector
+
+    @model_validator(mode="after")
+    def _check_lengths(self):
+        _check_same_length(self.x, self.y, "x and y must have the same length")
+        return self
 
 class LineParams(BaseModel):
     """All parameters for line plot in one flat structure"""
@@ -36,6 +81,11 @@ class ScatterParams(BaseModel):
     x_label: Optional[str] = None
     y_label: Optional[str] = None
 
+    @model_validator(mode="after")
+    def _check_lengths(self):
+        _check_same_length(self.x, self.y, "x and y must have the same length")
+        return self
+
 # 3. plot_bar - Simple flat structure
 class BarParams(BaseModel):
     """All parameters for bar chart in one flat structure"""
@@ -50,11 +100,16 @@ class BarParams(BaseModel):
     x_label: Optional[str] = None
     y_label: Optional[str] = None
 
+    @model_validator(mode="after")
+    def _check_lengths(self):
+        _check_same_length(self.categories, self.values, "categories and values must have the same length")
+        return self
+
 # 4. plot_area - Simple flat structure
 class AreaParams(BaseModel):
     """All parameters for area plot in one flat structure"""
-    x: List[float]
-    y: List[float]
+    x: FloatVector
+    y: FloatVector
     title: Optional[str] = None
     width: float = 800
     height: float = 400
@@ -63,10 +118,15 @@ class AreaParams(BaseModel):
     x_label: Optional[str] = None
     y_label: Optional[str] = None
 
+    @model_validator(mode="after")
+    def _check_lengths(self):
+        _check_same_length(self.x, self.y, "x and y must have the same length")
+        return self
+
 # 5. plot_histogram - Simple flat structure
 class HistogramParams(BaseModel):
     """All parameters for histogram in one flat structure"""
-    values: List[float]
+    values: FloatVector
     title: Optional[str] = None
     width: float = 800
     height: float = 400
@@ -96,7 +156,7 @@ class BoxParams(BaseModel):
 # 7. plot_heatmap - Simple flat structure
 class HeatmapParams(BaseModel):
     """All parameters for heatmap in one flat structure"""
-    matrix: List[List[float]]
+    matrix: FloatMatrix
     x_labels: List[str]
     y_labels: List[str]
     title: Optional[str] = None
@@ -105,20 +165,33 @@ class HeatmapParams(BaseModel):
     color_scale: Literal["viridis", "plasma", "gray"] = "viridis"
     show_values: bool = False
 
+    @model_validator(mode="after")
+    def _check_shape(self):
+        if self.matrix.shape != (len(self.y_labels), len(self.x_labels)):
+            raise ValueError("matrix must have one row per y label and one column per x label")
+        return self
+
 # 8. plot_contour - Simple flat structure
 class ContourParams(BaseModel):
     """All parameters for contour plot in one flat structure"""
-    x: List[float]
-    y: List[float]
-    z: List[List[float]]
+    x: FloatVector
+    y: FloatVector
+    z: FloatMatrix
     title: Optional[str] = None
     width: float = 800
     height: float = 400
-    levels: int = 10
+    levels: int = Field(10, ge=1)
     stroke_width: float = 1
+    show_labels: bool = True
     x_label: Optional[str] = None
     y_label: Optional[str] = None
 
+    @model_validator(mode="after")
+    def _check_shape(self):
+        if self.z.shape != (len(self.y), len(self.x)):
+            raise ValueError("z must have one row per y value and one column per x value")
+        return self
+
 # 9. plot_pie - Simple flat structure
 class PieParams(BaseModel):
     """All parameters for pie chart in one flat structure"""
@@ -130,10 +203,32 @@ class PieParams(BaseModel):
     inner_radius_ratio: float = 0.0
     start_angle: float = 0
 
+    @model_validator(mode="after")
+    def _check_values(self):
+        _check_same_length(self.labels, self.values, "labels and values must have the same length")
+        values = np.asarray(self.values, dtype=np.float64)
+        if not np.isfinite(values).all() or (values < 0).any():
+            raise ValueError("values must be finite and non-negative")
+        return self
+
+# 10. plot_batch - Several independent plots in one call
+class BatchItem(BaseModel):
+    """One plot of a batch: the plot type and that tool's parameters"""
+    type: Literal["line", "scatter", "bar", "area", "histogram", "box", "heatmap", "contour", "pie"]
+    params: Dict[str, Any]
+
+class BatchParams(BaseModel):
+    """All plots to render in one batch"""
+    items: List[BatchItem]
+
 # --- Response ---
 class PlotOutput(BaseModel):
     svg_path: Optional[str] = None
     svg: Optional[str] = None
+    # Base64 of the gzip-compressed SVG, sent instead of svg with --response-format svgz
+    svg_gz: Optional[str] = None
+    # The plot type and its inputs, for clients that render themselves
+    data: Optional[Dict[str, Any]] = None
     width: float
     height: float
     viewBox: str
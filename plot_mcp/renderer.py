@@ -1,61 +1,182 @@
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+import base64
+import gzip
 import io
+import math
+import re
+import threading
+from collections import OrderedDict
+from functools import cache
 import numpy as np
 from .models import *
+from .svg_emit import SvgBuilder, encode_png, fmt, fmt_points, value_grid
 
-# Make output deterministic
-matplotlib.rcParams['svg.hashsalt'] = 'plot-mcp'
+@cache
+def _figure_classes():
+    """Import and configure matplotlib on first use, returning (Figure, FigureCanvasSVG).
 
-def _setup_figure(width: float, height: float, title: str = None, x_label: str = None, y_label: str = None, is_polar=False):
+    Only box plots need a Figure, so the CLI (and servers that
+    never draw one) don't pay for importing matplotlib at startup. Figures are
+    attached to an SVG canvas directly instead of going through pyplot, which
+    would register every figure in its global figure manager.
+    """
+    import matplotlib
+    from matplotlib import _path
+    from matplotlib.backends import backend_svg
+    from matplotlib.figure import Figure
+
+    # Make output deterministic
+    matplotlib.rcParams['svg.hashsalt'] = 'plot-mcp'
+
+    # Emit text as <text> elements instead of embedding glyph outlines
+    matplotlib.rcParams['svg.fonttype'] = 'none'
+
+    # Write SVG coordinates with at most 2 decimals (matplotlib uses 6), which is
+    # well below a pixel and cuts the size of path-heavy output considerably
+    def _short_float_fmt(x):
+        return f'{x:.2f}'.rstrip('0').rstrip('.')
+
+    def _convert_path(self, path, transform=None, clip=None, simplify=None, sketch=None):
+        clip = (0.0, 0.0, self.width, self.height) if clip else None
+        return _path.convert_to_string(
+            path, transform, clip, simplify, sketch, 2,
+            [b'M', b'L', b'Q', b'C', b'z'], False).decode('ascii')
+
+    backend_svg._short_float_fmt = _short_float_fmt
+    backend_svg.RendererSVG._convert_path = _convert_path
+    return Figure, backend_svg.FigureCanvasSVG
+
+def _color(color: str) -> str:
+    """Normalize any matplotlib color spec (names, 'C1', 'tab:blue', ...) to hex"""
+    from matplotlib.colors import to_hex
+    return to_hex(color)
+
+# Default margins (pixels), shared by the matplotlib and direct SVG paths
+MARGIN_LEFT = 50
+MARGIN_RIGHT = 20
+MARGIN_TOP = 40
+MARGIN_BOTTOM = 40
+
+# matplotlib's default "tab10" color cycle
+PALETTE = [
+    "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+    "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf",
+]
+
+# Figures are reused across calls instead of being created and closed for each
+# render. Each key holds a free list; a figure is checked out for the duration
+# of one render, so concurrent tool calls never share a figure. Clients can
+# ask for any size, so only the most recently used sizes keep their figures.
+_FIG_POOL: "OrderedDict[tuple[float, float, bool], list]" = OrderedDict()
+_FIG_POOL_LOCK = threading.Lock()
+_FIG_POOL_SIZE = 4
+_FIG_POOL_KEYS = 8
+
+def _setup_figure(width: float, height: float, title: str = None, x_label: str = None, y_label: str = None):
     """Setup figure with simplified parameters"""
-    # dpi=72 is standard for screen
-    dpi = 72
-    fig = plt.figure(figsize=(width / dpi, height / dpi), dpi=dpi)
-    
-    # Transparent background
-    fig.patch.set_alpha(0.0)
-
-    # Default margins
-    margin_left = 50 / width
-    margin_right = 1.0 - (20 / width)
-    margin_bottom = 40 / height
-    margin_top = 1.0 - (40 / height)
-    
-    fig.subplots_adjust(left=margin_left, bottom=margin_bottom, right=margin_right, top=margin_top)
-    
-    if is_polar:
-        ax = fig.add_subplot(111, projection='polar')
-    else:
+    key = (width, height)
+    with _FIG_POOL_LOCK:
+        free = _FIG_POOL.get(key)
+        fig = free.pop() if free else None
+
+    if fig is None:
+        # dpi=72 is standard for screen
+        dpi = 72
+        Figure, FigureCanvasSVG = _figure_classes()
+        fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+        FigureCanvasSVG(fig)
+        fig._pool_key = key
+
+        # Transparent background (the figure is printed directly, not through
+        # savefig(transparent=True), so the backgrounds are simply not drawn)
+        fig.patch.set_visible(False)
+
+        # Default margins
+        margin_left = MARGIN_LEFT / width
+        margin_right = 1.0 - (MARGIN_RIGHT / width)
+        margin_bottom = MARGIN_BOTTOM / height
+        margin_top = 1.0 - (MARGIN_TOP / height)
+
+        fig.subplots_adjust(left=margin_left, bottom=margin_bottom, right=margin_right, top=margin_top)
+
         ax = fig.add_subplot(111)
+    else:
+        ax = fig.axes[0]
+    # clear() replaces the axes background patch, so hide it on every checkout
+    ax.patch.set_visible(False)
 
     if title:
         ax.set_title(title)
 
     # Axis labels
-    if not is_polar:
-        if x_label:
-            ax.set_xlabel(x_label)
-        if y_label:
-            ax.set_ylabel(y_label)
+    if x_label:
+        ax.set_xlabel(x_label)
+    if y_label:
+        ax.set_ylabel(y_label)
 
     return fig, ax
 
-def _finalize(fig, width: float, height: float) -> PlotOutput:
-    """Finalize and return plot output"""
-    f = io.StringIO()
-    fig.savefig(f, format='svg', transparent=True)
-    plt.close(fig)
-    
-    full_svg = f.getvalue()
-    
-    # Extract <svg ... > ... </svg>
-    start_idx = full_svg.find("<svg")
-    if start_idx == -1:
-        svg_content = full_svg
-    else:
-        svg_content = full_svg[start_idx:]
+def warm_up():
+    """Render a small throwaway figure so fonts and the SVG backend are loaded before the first request"""
+    fig, ax = _setup_figure(200, 100, "warm up", "x", "y")
+    ax.plot([0, 1], [0, 1])
+    _finalize(fig, 200, 100)
+
+def _release_figure(fig):
+    """Clear a figure and return it to the pool (or drop it if the pool is full)"""
+    fig.axes[0].clear()
+    with _FIG_POOL_LOCK:
+        free = _FIG_POOL.setdefault(fig._pool_key, [])
+        _FIG_POOL.move_to_end(fig._pool_key)
+        if len(free) < _FIG_POOL_SIZE:
+            free.append(fig)
+        if len(_FIG_POOL) > _FIG_POOL_KEYS:
+            # Drop the free figures of the least recently used size
+            _FIG_POOL.popitem(last=False)
+
+# Metadata keys matplotlib would otherwise fill in; with all of them unset the
+# <metadata> block is omitted and output no longer varies with the clock
+_SVG_METADATA = {'Date': None, 'Creator': None, 'Format': None, 'Type': None}
+
+_COMMENT_RE = re.compile(rb"<!--.*?-->", re.DOTALL)
+_INTERTAG_WS_RE = re.compile(rb">\s+<")
+
+def _minify(svg) -> bytes:
+    """Drop the indentation/line breaks matplotlib writes between elements, and comments"""
+    # Reads straight from the (possibly memoryview) input, so this is the
+    # first copy of the document
+    svg = _INTERTAG_WS_RE.sub(b"><", svg)
+    # Path data puts each command on its own line
+    svg = svg.replace(b" \n", b" ")
+    # Only mathtext is written with comments (the source string)
+    if b"<!--" in svg:
+        svg = _COMMENT_RE.sub(b"", svg)
+    return svg
+
+def _finalize(fig, width: float, height: float, path: str = None) -> PlotOutput:
+    """Finalize and return plot output; with a path the SVG goes to disk only"""
+    # print_svg skips savefig's per-call rcParams/bbox/facecolor handling,
+    # none of which applies to a pooled figure of fixed size
+    if path:
+        # Written as printed; minifying would need the whole document in memory
+        fig.canvas.print_svg(path, metadata=_SVG_METADATA)
+        _release_figure(fig)
+        return PlotOutput(
+            svg_path=path,
+            width=width,
+            height=height,
+            viewBox=f"0 0 {width} {height}"
+        )
+
+    buf = io.BytesIO()
+    fig.canvas.print_svg(buf, metadata=_SVG_METADATA)
+    _release_figure(fig)
+
+    # Extract <svg ... > ... </svg>; the XML prolog is short, so only the
+    # head is searched and the rest is minified straight from the buffer
+    mv = buf.getbuffer()
+    start_idx = bytes(mv[:512]).find(b"<svg")
+    svg_content = _minify(mv[max(start_idx, 0):]).decode("utf-8")
+    mv.release()
     
     return PlotOutput(
         svg=svg_content,
@@ -64,79 +185,344 @@ def _finalize(fig, width: float, height: float) -> PlotOutput:
         viewBox=f"0 0 {width} {height}"
     )
 
-def render_line(params: LineParams) -> PlotOutput:
-    """Render line plot with flat parameters"""
-    fig, ax = _setup_figure(params.width, params.height, params.title, params.x_label, params.y_label)
-    
-    for series in params.series:
-        # Map style names to matplotlib
-        mpl_ls = "-"
-        if params.line_style == "dashed": 
-            mpl_ls = "--"
-        elif params.line_style == "dotted": 
-            mpl_ls = ":"
-            
-        ax.plot(
-            series.x, 
-            series.y, 
-            label=series.name, 
-            linestyle=mpl_ls, 
-            linewidth=params.stroke_width,
-            marker='o' if params.show_markers else None
+# --- Direct SVG path (line, scatter, bar, area, histogram, heatmap, contour, pie) ---
+
+class _Frame:
+    """Maps data coordinates onto the plot area of a direct SVG chart"""
+
+    def __init__(self, width: float, height: float, xlim: tuple, ylim: tuple):
+        self.left = MARGIN_LEFT
+        self.right = width - MARGIN_RIGHT
+        self.top = MARGIN_TOP
+        self.bottom = height - MARGIN_BOTTOM
+        self.xlim = xlim
+        self.ylim = ylim
+        self._sx = (self.right - self.left) / (xlim[1] - xlim[0])
+        self._sy = (self.bottom - self.top) / (ylim[1] - ylim[0])
+
+    def px(self, x):
+        return (np.asarray(x, dtype=np.float64) - self.xlim[0]) * self._sx + self.left
+
+    def py(self, y):
+        return self.bottom - (np.asarray(y, dtype=np.float64) - self.ylim[0]) * self._sy
+
+def _limits(lo: float, hi: float, sticky_zero: bool = False) -> tuple:
+    """Pad a data range with 5% margins like matplotlib's autoscale"""
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    pad = (hi - lo) * 0.05
+    new_lo, new_hi = lo - pad, hi + pad
+    # Bars and areas start at zero, so don't pad past the baseline
+    if sticky_zero:
+        if lo == 0:
+            new_lo = 0.0
+        if hi == 0:
+            new_hi = 0.0
+    return new_lo, new_hi
+
+def _extent(arrays) -> tuple:
+    """Min/max of the finite values over several arrays, (0, 1) when there are none"""
+    arrays = [a[np.isfinite(a)] for a in arrays]
+    arrays = [a for a in arrays if a.size]
+    if not arrays:
+        return 0.0, 1.0
+    return min(float(a.min()) for a in arrays), max(float(a.max()) for a in arrays)
+
+def _finite_runs(x: np.ndarray, y: np.ndarray) -> list:
+    """Split paired arrays at non-finite points, which matplotlib draws as gaps"""
+    ok = np.isfinite(x) & np.isfinite(y)
+    if ok.all():
+        return [(x, y)]
+    # Start/end indices of each run of finite points
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], ok.view(np.int8), [0]))))
+    return [(x[a:b], y[a:b]) for a, b in zip(edges[::2].tolist(), edges[1::2].tolist())]
+
+def _decimate(runs: list, max_points: int) -> list:
+    """LTTB-reduce runs to about max_points in total, split in proportion to their length"""
+    total = sum(x.size for x, _ in runs)
+    if total <= max_points:
+        return runs
+    return [_lttb(x, y, max(3, max_points * x.size // total)) for x, y in runs]
+
+def _runs_path(frame: "_Frame", runs: list, close: str = "") -> str:
+    """Path data with one subpath per run"""
+    return "".join([f"M{fmt_points(frame.px(x), frame.py(y))}{close}" for x, y in runs])
+
+def _nice_ticks(lo: float, hi: float, n: int = 6):
+    """Pick round tick positions inside [lo, hi] and their labels"""
+    span = hi - lo
+    mag = 10 ** math.floor(math.log10(span / n))
+    for m in (1, 2, 2.5, 5, 10):
+        step = m * mag
+        if span / step <= n:
+            break
+    start = math.ceil(lo / step) * step
+    ticks = start + step * np.arange(int(math.floor((hi - start) / step + 1e-9)) + 1)
+    # A step of 2.5 * 10^k needs one more decimal than 10^k, unless it is a whole number
+    decimals = max(0, -math.floor(math.log10(step) + 1e-9) + (m == 2.5))
+    labels = [f"{0.0 if abs(t) < step * 1e-9 else t:.{decimals}f}" for t in ticks.tolist()]
+    return ticks, labels
+
+def _setup_svg(width: float, height: float, title: str = None) -> SvgBuilder:
+    """Start a direct SVG document"""
+    svg = SvgBuilder(width, height, font_family="DejaVu Sans, sans-serif")
+    if title:
+        svg.text(width / 2, MARGIN_TOP - 8, title, font_size=12, text_anchor="middle")
+    return svg
+
+def _draw_axes(svg: SvgBuilder, frame: _Frame, x_label: str = None, y_label: str = None, x_ticks=None, y_ticks=None, x_rotation: float = 0):
+    """Draw the frame, ticks and axis labels; ticks default to round numbers"""
+    x_pos, x_text = x_ticks if x_ticks is not None else _nice_ticks(*frame.xlim)
+    y_pos, y_text = y_ticks if y_ticks is not None else _nice_ticks(*frame.ylim)
+
+    svg.rect(frame.left, frame.top, frame.right - frame.left, frame.bottom - frame.top,
+             fill="none", stroke="black", stroke_width=0.8)
+
+    svg.open_group(stroke="black", stroke_width=0.8)
+    for x in frame.px(x_pos).tolist():
+        svg.line(x, frame.bottom, x, frame.bottom + 3.5)
+    for y in frame.py(y_pos).tolist():
+        svg.line(frame.left - 3.5, y, frame.left, y)
+    svg.close_group()
+
+    svg.open_group(font_size=10)
+    if x_rotation:
+        # Rotated labels hang from their tick, anchored at the text end
+        svg.open_group(text_anchor="end")
+        y = frame.bottom + 10
+        for x, label in zip(frame.px(x_pos).tolist(), x_text):
+            svg.text(x, y, label, transform=f"rotate({-x_rotation} {fmt(x)} {fmt(y)})")
+    else:
+        svg.open_group(text_anchor="middle")
+        for x, label in zip(frame.px(x_pos).tolist(), x_text):
+            svg.text(x, frame.bottom + 15, label)
+    svg.close_group()
+    svg.open_group(text_anchor="end")
+    for y, label in zip(frame.py(y_pos).tolist(), y_text):
+        svg.text(frame.left - 6, y + 3.5, label)
+    svg.close_group()
+    if x_label:
+        svg.text((frame.left + frame.right) / 2, frame.bottom + 30, x_label, text_anchor="middle")
+    if y_label:
+        cx, cy = 12, (frame.top + frame.bottom) / 2
+        svg.text(cx, cy, y_label, text_anchor="middle", transform=f"rotate(-90 {fmt(cx)} {fmt(cy)})")
+    svg.close_group()
+
+def _finalize_svg(svg: SvgBuilder, width: float, height: float, path: str = None) -> PlotOutput:
+    """Finalize a direct SVG document and return plot output"""
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            svg.write_to(f)
+        return PlotOutput(
+            svg_path=path,
+            width=width,
+            height=height,
+            viewBox=f"0 0 {width} {height}"
         )
-    
+
+    return PlotOutput(
+        svg=svg.getvalue(),
+        width=width,
+        height=height,
+        viewBox=f"0 0 {width} {height}"
+    )
+
+def _lttb(x: np.ndarray, y: np.ndarray, n_out: int):
+    """Largest-Triangle-Three-Buckets downsampling to n_out points.
+
+    Keeps the first and last points and, from each bucket in between, the
+    point forming the largest triangle with the previously kept point and
+    the mean of the next bucket, which preserves the visual shape.
+    """
+    n = x.size
+    if n_out < 3 or n_out >= n:
+        return x, y
+
+    # n_out - 2 buckets over the interior points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Bucket means from prefix sums; the last bucket looks ahead to the final point
+    cx = np.concatenate(([0.0], np.cumsum(x)))
+    cy = np.concatenate(([0.0], np.cumsum(y)))
+    counts = ends - starts
+    next_x = np.append(((cx[ends] - cx[starts]) / counts)[1:], x[-1])
+    next_y = np.append(((cy[ends] - cy[starts]) / counts)[1:], y[-1])
+
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for k, (s, e) in enumerate(zip(starts.tolist(), ends.tolist())):
+        area = np.abs((x[a] - next_x[k]) * (y[s:e] - y[a]) - (x[a] - x[s:e]) * (next_y[k] - y[a]))
+        a = s + int(np.argmax(area))
+        idx[k + 1] = a
+    return x[idx], y[idx]
+
+def render_line(params: LineParams, path: str = None) -> PlotOutput:
+    """Render line plot with flat parameters"""
+    svg = _setup_svg(params.width, params.height, params.title)
+
+    xs = [s.x for s in params.series]
+    ys = [s.y for s in params.series]
+    frame = _Frame(params.width, params.height, _limits(*_extent(xs)), _limits(*_extent(ys)))
+
+    # Non-finite points break a line; long series have far more points than
+    # pixels, so decimate them to 2 per pixel
+    max_points = int(params.width * 2)
+    series_runs = [_decimate(_finite_runs(x, y), max_points) for x, y in zip(xs, ys)]
+
+    dash = None
+    if params.line_style == "dashed":
+        dash = f"{3.7 * params.stroke_width:.2f},{1.6 * params.stroke_width:.2f}"
+    elif params.line_style == "dotted":
+        dash = f"{params.stroke_width:.2f},{1.65 * params.stroke_width:.2f}"
+
+    for i, runs in enumerate(series_runs):
+        color = PALETTE[i % len(PALETTE)]
+        stroke = dict(fill="none", stroke=color, stroke_width=params.stroke_width,
+                      stroke_dasharray=dash, stroke_linejoin="round")
+        # One element per series rather than one per segment
+        if len(runs) == 1:
+            svg.polyline(frame.px(runs[0][0]), frame.py(runs[0][1]), **stroke)
+        else:
+            svg.path(_runs_path(frame, runs), **stroke)
+        if params.show_markers:
+            svg.open_group(fill=color)
+            for x, y in runs:
+                svg.circles(frame.px(x), frame.py(y), 3)
+            svg.close_group()
+
+    _draw_axes(svg, frame, params.x_label, params.y_label)
+
     if len(params.series) > 1:
-        ax.legend()
-        
-    return _finalize(fig, params.width, params.height)
+        # Legend in the upper right corner of the plot area
+        names = [s.name for s in params.series]
+        box_w = 40 + 6 * max(len(n) for n in names)
+        box_x = frame.right - box_w - 8
+        box_y = frame.top + 8
+        svg.rect(box_x, box_y, box_w, 8 + 16 * len(names), fill="white", fill_opacity=0.8, stroke="#cccccc")
+        for i, name in enumerate(names):
+            y = box_y + 12 + 16 * i
+            svg.line(box_x + 6, y, box_x + 26, y, stroke=PALETTE[i % len(PALETTE)],
+                     stroke_width=params.stroke_width, stroke_dasharray=dash)
+            svg.text(box_x + 32, y + 3.5, name, font_size=10)
 
-def render_scatter(params: ScatterParams) -> PlotOutput:
+    return _finalize_svg(svg, params.width, params.height, path)
+
+# Above this many (opaque) points a scatter is drawn as a single <path>
+_SCATTER_PATH_MIN_POINTS = 5000
+
+def render_scatter(params: ScatterParams, path: str = None) -> PlotOutput:
     """Render scatter plot with flat parameters"""
-    fig, ax = _setup_figure(params.width, params.height, params.title, params.x_label, params.y_label)
-    
-    ax.scatter(
-        params.x, params.y,
-        s=params.point_radius ** 2,  # s is area
-        c=params.color,
-        alpha=params.opacity
-    )
-    
-    return _finalize(fig, params.width, params.height)
+    svg = _setup_svg(params.width, params.height, params.title)
+
+    x = np.asarray(params.x, dtype=np.float64)
+    y = np.asarray(params.y, dtype=np.float64)
+    # Points with a non-finite coordinate are not drawn
+    ok = np.isfinite(x) & np.isfinite(y)
+    x, y = x[ok], y[ok]
+    frame = _Frame(params.width, params.height, _limits(*_extent([x])), _limits(*_extent([y])))
+
+    # matplotlib's marker size is an area, so point_radius was the marker diameter
+    r = params.point_radius / 2
+    if x.size > _SCATTER_PATH_MIN_POINTS and params.opacity >= 1:
+        # One node instead of one per point keeps huge scatters cheap to parse;
+        # translucent points keep separate circles so overlaps still darken
+        svg.dots(frame.px(x), frame.py(y), r, stroke=_color(params.color))
+    else:
+        svg.open_group(fill=_color(params.color), fill_opacity=params.opacity)
+        svg.circles(frame.px(x), frame.py(y), r)
+        svg.close_group()
+
+    _draw_axes(svg, frame, params.x_label, params.y_label)
 
-def render_bar(params: BarParams) -> PlotOutput:
+    return _finalize_svg(svg, params.width, params.height, path)
+
+def render_bar(params: BarParams, path: str = None) -> PlotOutput:
     """Render bar chart with flat parameters"""
-    fig, ax = _setup_figure(params.width, params.height, params.title, params.x_label, params.y_label)
-    
+    svg = _setup_svg(params.width, params.height, params.title)
+
+    values = np.asarray(params.values, dtype=np.float64)
+    positions = np.arange(len(params.categories), dtype=np.float64)
+    half = params.bar_width / 2
+    cat_lim = _limits(-half, len(params.categories) - 1 + half)
+    val_lo, val_hi = _extent([values])
+    val_lim = _limits(min(val_lo, 0.0), max(val_hi, 0.0), sticky_zero=True)
+    cat_ticks = (positions, params.categories)
+    # Bars with a non-finite value are left out
+    ok = np.isfinite(values)
+
+    svg.open_group(fill=_color(params.color))
     if params.orientation == "vertical":
-        ax.bar(params.categories, params.values, width=params.bar_width, color=params.color)
+        frame = _Frame(params.width, params.height, cat_lim, val_lim)
+        x0 = frame.px(positions - half)
+        x1 = frame.px(positions + half)
+        y0 = frame.py(np.minimum(values, 0))
+        y1 = frame.py(np.maximum(values, 0))
+        for x, y, w, h in zip(x0[ok].tolist(), y1[ok].tolist(), (x1 - x0)[ok].tolist(), (y0 - y1)[ok].tolist()):
+            svg.rect(x, y, w, h)
+        svg.close_group()
+        _draw_axes(svg, frame, params.x_label, params.y_label, x_ticks=cat_ticks)
     else:
-        ax.barh(params.categories, params.values, height=params.bar_width, color=params.color)
-        
-    return _finalize(fig, params.width, params.height)
+        frame = _Frame(params.width, params.height, val_lim, cat_lim)
+        x0 = frame.px(np.minimum(values, 0))
+        x1 = frame.px(np.maximum(values, 0))
+        y0 = frame.py(positions + half)
+        y1 = frame.py(positions - half)
+        for x, y, w, h in zip(x0[ok].tolist(), y0[ok].tolist(), (x1 - x0)[ok].tolist(), (y1 - y0)[ok].tolist()):
+            svg.rect(x, y, w, h)
+        svg.close_group()
+        _draw_axes(svg, frame, params.x_label, params.y_label, y_ticks=cat_ticks)
+
+    return _finalize_svg(svg, params.width, params.height, path)
 
-def render_area(params: AreaParams) -> PlotOutput:
+def render_area(params: AreaParams, path: str = None) -> PlotOutput:
     """Render area plot with flat parameters"""
-    fig, ax = _setup_figure(params.width, params.height, params.title, params.x_label, params.y_label)
-    
-    ax.fill_between(params.x, params.y, color=params.fill_color, alpha=params.opacity)
-    
-    return _finalize(fig, params.width, params.height)
+    svg = _setup_svg(params.width, params.height, params.title)
+
+    x = np.asarray(params.x, dtype=np.float64)
+    y = np.asarray(params.y, dtype=np.float64)
+    y_lo, y_hi = _extent([y])
+    frame = _Frame(params.width, params.height, _limits(*_extent([x])),
+                   _limits(min(y_lo, 0.0), max(y_hi, 0.0), sticky_zero=True))
+
+    # Split at non-finite points and decimate to 2 points per pixel, as in render_line
+    runs = _decimate(_finite_runs(x, y), int(params.width * 2))
+    # Close each polygon along the y=0 baseline
+    runs = [
+        (np.concatenate(([rx[0]], rx, [rx[-1]])), np.concatenate(([0.0], ry, [0.0])))
+        for rx, ry in runs if rx.size
+    ]
+    if runs:
+        svg.path(_runs_path(frame, runs, "Z"), fill=_color(params.fill_color), fill_opacity=params.opacity)
+
+    _draw_axes(svg, frame, params.x_label, params.y_label)
+
+    return _finalize_svg(svg, params.width, params.height, path)
 
-def render_histogram(params: HistogramParams) -> PlotOutput:
+def render_histogram(params: HistogramParams, path: str = None) -> PlotOutput:
     """Render histogram with flat parameters"""
-    fig, ax = _setup_figure(params.width, params.height, params.title, params.x_label, params.y_label)
-    
-    ax.hist(
-        params.values, 
-        bins=params.bins, 
-        density=params.density, 
-        color=params.color,
-        edgecolor='black'
-    )
-    
-    return _finalize(fig, params.width, params.height)
+    svg = _setup_svg(params.width, params.height, params.title)
 
-def render_box(params: BoxParams) -> PlotOutput:
+    # Like matplotlib, bin only the finite values
+    values = params.values[np.isfinite(params.values)]
+    counts, edges = np.histogram(values, bins=params.bins, density=params.density)
+    frame = _Frame(params.width, params.height, _limits(edges[0], edges[-1]),
+                   _limits(0.0, max(float(counts.max()), 0.0), sticky_zero=True))
+
+    # All bars as closed subpaths of a single <path>
+    x0 = frame.px(edges[:-1]).tolist()
+    x1 = frame.px(edges[1:]).tolist()
+    ys = frame.py(counts).tolist()
+    base = f"{frame.py(0.0):.2f}"
+    d = "".join([f"M{a:.2f},{base}V{y:.2f}H{b:.2f}V{base}Z" for a, b, y in zip(x0, x1, ys)])
+    svg.path(d, fill=_color(params.color), stroke="black", stroke_width=1)
+
+    _draw_axes(svg, frame, params.x_label, params.y_label)
+
+    return _finalize_svg(svg, params.width, params.height, path)
+
+def render_box(params: BoxParams, path: str = None) -> PlotOutput:
     """Render box plot with flat parameters"""
     fig, ax = _setup_figure(params.width, params.height, params.title, params.x_label, params.y_label)
     
@@ -144,74 +530,202 @@ def render_box(params: BoxParams) -> PlotOutput:
     values = [g.values for g in params.groups]
     labels = [g.name for g in params.groups]
     
-    bp = ax.boxplot(
+    # The fill is applied as the boxes are created rather than patched afterwards
+    ax.boxplot(
         values, 
         labels=labels, 
         widths=params.box_width, 
-        patch_artist=True
+        patch_artist=True,
+        boxprops=dict(facecolor=params.color)
     )
-    
-    for patch in bp['boxes']:
-        patch.set_facecolor(params.color)
         
-    return _finalize(fig, params.width, params.height)
+    return _finalize(fig, params.width, params.height, path)
+
+def _heatmap_values(frame: _Frame, matrix: np.ndarray) -> str:
+    """Cell value labels as one prebuilt block of SVG text"""
+    rows, cols = matrix.shape
+    x_text = [fmt(x) for x in frame.px(np.arange(cols)).tolist()]
+    # +3.5 centers 10px text vertically
+    y_text = [fmt(y) for y in (frame.py(np.arange(rows)) + 3.5).tolist()]
+
+    # Dark text on the bright half of the colormap, white text on the dark half
+    bright = matrix > (np.nanmin(matrix) + np.nanmax(matrix)) / 2
+    attrs = dict(font_size=10, text_anchor="middle")
+    return "".join(
+        value_grid(x_text, y_text, *np.nonzero(mask), matrix[mask], fill=fill, **attrs)
+        for fill, mask in (("white", ~bright), ("black", bright))
+    )
+
+@cache
+def _color_lut(color_scale: str) -> np.ndarray:
+    """256-entry RGBA uint8 lookup table for a heatmap color scale"""
+    import matplotlib
+    return matplotlib.colormaps[color_scale](np.linspace(0, 1, 256), bytes=True)
 
-def render_heatmap(params: HeatmapParams) -> PlotOutput:
+def _colorize(matrix: np.ndarray, color_scale: str) -> np.ndarray:
+    """Map a matrix onto a colormap as (H, W, 4) uint8 RGBA; NaN cells stay transparent"""
+    nan = np.isnan(matrix)
+    mn, mx = np.nanmin(matrix), np.nanmax(matrix)
+    scale = 256.0 / (mx - mn) if mx > mn else 0.0
+    # Normalize and quantize to a LUT index in one pass (same binning as matplotlib)
+    idx = np.clip((np.where(nan, mn, matrix) - mn) * scale, 0, 255).astype(np.uint8)
+    rgba = _color_lut(color_scale)[idx]
+    rgba[nan] = 0
+    return rgba
+
+def render_heatmap(params: HeatmapParams, path: str = None) -> PlotOutput:
     """Render heatmap with flat parameters"""
-    fig, ax = _setup_figure(params.width, params.height, params.title)
-    
-    matrix = np.array(params.matrix)
-    
-    im = ax.imshow(
-        matrix, 
-        cmap=params.color_scale,
-        aspect='auto'
+    svg = _setup_svg(params.width, params.height, params.title)
+
+    matrix = params.matrix
+    rows, cols = matrix.shape
+    # Cell (i, j) is centered on (j, i) with row 0 at the top, as in imshow;
+    # an empty matrix still gets a one-cell frame
+    frame = _Frame(params.width, params.height, (-0.5, max(cols, 1) - 0.5), (max(rows, 1) - 0.5, -0.5))
+
+    # An empty or all-NaN matrix has nothing to color or label
+    if not np.isnan(matrix).all():
+        # The whole grid is one embedded image with one pixel per cell
+        svg.image(frame.left, frame.top, frame.right - frame.left, frame.bottom - frame.top,
+                  encode_png(_colorize(matrix, params.color_scale)), style="image-rendering:pixelated")
+        if params.show_values:
+            svg.raw(_heatmap_values(frame, matrix))
+
+    _draw_axes(
+        svg, frame,
+        x_ticks=(np.arange(len(params.x_labels)), params.x_labels),
+        y_ticks=(np.arange(len(params.y_labels)), params.y_labels),
+        x_rotation=45
     )
-    
-    # Tick labels
-    ax.set_xticks(np.arange(len(params.x_labels)), labels=params.x_labels)
-    ax.set_yticks(np.arange(len(params.y_labels)), labels=params.y_labels)
-    
-    # Rotate the tick labels
-    plt.setp(ax.get_xticklabels(), rotation=45, ha="right", rotation_mode="anchor")
-    
-    if params.show_values:
-        for i in range(len(params.y_labels)):
-            for j in range(len(params.x_labels)):
-                ax.text(j, i, f"{matrix[i, j]:.2f}",
-                       ha="center", va="center", color="w")
 
-    return _finalize(fig, params.width, params.height)
+    return _finalize_svg(svg, params.width, params.height, path)
 
-def render_contour(params: ContourParams) -> PlotOutput:
+def _contour_levels(zmin: float, zmax: float, n: int) -> np.ndarray:
+    """Round iso-levels strictly inside (zmin, zmax), matplotlib's default for contour lines"""
+    from matplotlib.ticker import MaxNLocator
+
+    levels = MaxNLocator(n + 1, min_n_ticks=1).tick_values(zmin, zmax)
+    inside = levels[(levels > zmin) & (levels < zmax)]
+    return inside if inside.size else np.array([zmin])
+
+def _contour_label(svg: SvgBuilder, px: np.ndarray, py: np.ndarray, text: str, color: str):
+    """Label a contour line halfway along its length, rotated along the line"""
+    seg = np.hypot(np.diff(px), np.diff(py))
+    cum = np.cumsum(seg)
+    k = min(int(np.searchsorted(cum, cum[-1] / 2)), seg.size - 1)
+    t = (cum[-1] / 2 - (cum[k] - seg[k])) / seg[k] if seg[k] else 0.0
+    dx, dy = px[k + 1] - px[k], py[k + 1] - py[k]
+    x, y = float(px[k] + t * dx), float(py[k] + t * dy)
+    angle = math.degrees(math.atan2(dy, dx))
+    if angle > 90:
+        angle -= 180
+    elif angle < -90:
+        angle += 180
+    # A white halo stands in for the gap matplotlib cuts into the line
+    svg.text(x, y + 3.5, text, fill=color, font_size=10, text_anchor="middle",
+             stroke="white", stroke_width=3, paint_order="stroke",
+             transform=f"rotate({angle:.1f} {fmt(x)} {fmt(y)})")
+
+def render_contour(params: ContourParams, path: str = None) -> PlotOutput:
     """Render contour plot with flat parameters"""
-    fig, ax = _setup_figure(params.width, params.height, params.title, params.x_label, params.y_label)
-    
-    X, Y = np.meshgrid(params.x, params.y)
-    Z = np.array(params.z)
-    
-    cs = ax.contour(
-        X, Y, Z, 
-        levels=params.levels, 
-        linewidths=params.stroke_width
-    )
-    ax.clabel(cs, inline=True, fontsize=10)
-    
-    return _finalize(fig, params.width, params.height)
+    from contourpy import contour_generator
+
+    svg = _setup_svg(params.width, params.height, params.title)
 
-def render_pie(params: PieParams) -> PlotOutput:
+    x, y = params.x, params.y
+    # Contours fill the data range exactly, without autoscale margins
+    x_lo, x_hi = _extent([x])
+    y_lo, y_hi = _extent([y])
+    frame = _Frame(params.width, params.height,
+                   (x_lo, x_hi) if x_hi > x_lo else _limits(x_lo, x_hi),
+                   (y_lo, y_hi) if y_hi > y_lo else _limits(y_lo, y_hi))
+
+    # Iso-lines are traced by contourpy (matplotlib's own contouring engine) and
+    # each level is written as a single <path>
+    z = np.ma.masked_invalid(params.z)
+    if min(z.shape) < 2 or not z.count():
+        # Nothing to trace (contourpy needs a 2x2 grid and finite values);
+        # draw the axes only
+        _draw_axes(svg, frame, params.x_label, params.y_label)
+        return _finalize_svg(svg, params.width, params.height, path)
+    gen = contour_generator(x, y, z, line_type="Separate")
+    levels = _contour_levels(float(z.min()), float(z.max()), params.levels)
+    lut = _color_lut("viridis")
+    span = levels[-1] - levels[0]
+
+    svg.open_group(fill="none", stroke_width=params.stroke_width)
+    labels = []
+    for level in levels.tolist():
+        rgba = lut[int(round((level - levels[0]) / span * 255)) if span else 0]
+        color = "#{:02x}{:02x}{:02x}".format(*rgba[:3].tolist())
+        lines = [(frame.px(l[:, 0]), frame.py(l[:, 1])) for l in gen.lines(level) if len(l) > 1]
+        if not lines:
+            continue
+        svg.path("".join([f"M{fmt_points(px, py)}" for px, py in lines]), stroke=color)
+        if params.show_labels:
+            # One label per level, on its longest line
+            labels.append((max(lines, key=lambda l: l[0].size), f"{level:g}", color))
+    svg.close_group()
+
+    for (px, py), text, color in labels:
+        _contour_label(svg, px, py, text, color)
+
+    _draw_axes(svg, frame, params.x_label, params.y_label)
+
+    return _finalize_svg(svg, params.width, params.height, path)
+
+def _arc(r: float, cx: float, cy: float, a0: float, a1: float) -> str:
+    """SVG arc commands from angle a0 to a1 (degrees), split so no piece exceeds 180 degrees"""
+    steps = max(1, math.ceil(abs(a1 - a0) / 180 - 1e-9))
+    sweep = 0 if a1 > a0 else 1
+    d = []
+    for k in range(1, steps + 1):
+        a = math.radians(a0 + (a1 - a0) * k / steps)
+        d.append(f"A{fmt(r)},{fmt(r)} 0 0,{sweep} {fmt(cx + r * math.cos(a))},{fmt(cy - r * math.sin(a))}")
+    return " ".join(d)
+
+def render_pie(params: PieParams, path: str = None) -> PlotOutput:
     """Render pie chart with flat parameters"""
-    fig, ax = _setup_figure(params.width, params.height, params.title, is_polar=False)
-    
-    wedgeprops = {}
-    if params.inner_radius_ratio > 0:
-        wedgeprops['width'] = 1.0 - params.inner_radius_ratio
-        
-    ax.pie(
-        params.values, 
-        labels=params.labels, 
-        startangle=params.start_angle,
-        wedgeprops=wedgeprops
-    )
-    
-    return _finalize(fig, params.width, params.height)
+    svg = _setup_svg(params.width, params.height, params.title)
+
+    values = np.asarray(params.values, dtype=np.float64)
+    total = values.sum()
+    if total <= 0:
+        raise ValueError("Pie values must sum to a positive number")
+
+    cx = (MARGIN_LEFT + params.width - MARGIN_RIGHT) / 2
+    cy = (MARGIN_TOP + params.height - MARGIN_BOTTOM) / 2
+    r = 0.4 * min(params.width - MARGIN_LEFT - MARGIN_RIGHT, params.height - MARGIN_TOP - MARGIN_BOTTOM)
+    r_in = r * params.inner_radius_ratio
+
+    # Wedges run counterclockwise from start_angle, like matplotlib
+    bounds = params.start_angle + 360.0 * np.concatenate(([0.0], np.cumsum(values) / total))
+    for i, (a0, a1) in enumerate(zip(bounds[:-1].tolist(), bounds[1:].tolist())):
+        t0, t1 = math.radians(a0), math.radians(a1)
+        d = f"M{fmt(cx + r * math.cos(t0))},{fmt(cy - r * math.sin(t0))} {_arc(r, cx, cy, a0, a1)}"
+        if r_in > 0:
+            d += f" L{fmt(cx + r_in * math.cos(t1))},{fmt(cy - r_in * math.sin(t1))} {_arc(r_in, cx, cy, a1, a0)}Z"
+        else:
+            d += f" L{fmt(cx)},{fmt(cy)}Z"
+        svg.path(d, fill=PALETTE[i % len(PALETTE)])
+
+    svg.open_group(font_size=10)
+    mids = np.radians((bounds[:-1] + bounds[1:]) / 2)
+    for label, t in zip(params.labels, mids.tolist()):
+        anchor = "start" if math.cos(t) >= 0 else "end"
+        svg.text(cx + 1.1 * r * math.cos(t), cy - 1.1 * r * math.sin(t) + 3.5, label, text_anchor=anchor)
+    svg.close_group()
+
+    return _finalize_svg(svg, params.width, params.height, path)
+
+def compress_output(output: PlotOutput) -> PlotOutput:
+    """Replace inline SVG with its gzip-compressed, base64-encoded form (.svgz contents)"""
+    if not output.svg:
+        return output
+    # mtime=0 keeps the compressed bytes identical across runs
+    data = gzip.compress(output.svg.encode("utf-8"), compresslevel=6, mtime=0)
+    return output.model_copy(update={"svg": None, "svg_gz": base64.b64encode(data).decode("ascii")})
+
+def render_compressed(render, params, path: str = None) -> PlotOutput:
+    """Render params and compress the inline SVG, in whichever process does the rendering"""
+    return compress_output(render(params, path))
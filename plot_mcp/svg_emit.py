@@ -0,0 +1,129 @@
+import base64
+import struct
+import zlib
+from html import escape
+import numpy as np
+
+def _attrs(attrs: dict) -> str:
+    """Serialize keyword attributes (stroke_width -> stroke-width)"""
+    return "".join(
+        f' {k.replace("_", "-")}="{v}"' for k, v in attrs.items() if v is not None
+    )
+
+def fmt(v: float) -> str:
+    """Format a single coordinate with 2-decimal precision"""
+    return f"{v:.2f}"
+
+def fmt_points(xs, ys) -> str:
+    """Format paired coordinate arrays as 'x,y x,y ...'"""
+    xs = np.asarray(xs, dtype=np.float64).tolist()
+    ys = np.asarray(ys, dtype=np.float64).tolist()
+    return " ".join([f"{x:.2f},{y:.2f}" for x, y in zip(xs, ys)])
+
+def value_grid(x_text, y_text, ii, jj, values, **attrs) -> str:
+    """Build a <g> of 2-decimal value labels for grid cells (ii[k], jj[k]).
+
+    x_text/y_text are the already formatted column/row coordinates, so each
+    coordinate is formatted once per column or row rather than once per cell.
+    """
+    body = "".join([
+        f'<text x="{x_text[j]}" y="{y_text[i]}">{v:.2f}</text>'
+        for i, j, v in zip(ii.tolist(), jj.tolist(), np.asarray(values).tolist())
+    ])
+    return f"<g{_attrs(attrs)}>{body}</g>"
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """Encode an (H, W, 4) uint8 array as a PNG using only zlib"""
+    h, w, _ = rgba.shape
+    # Each scanline starts with filter type 0 (None)
+    raw = np.zeros((h, w * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = rgba.reshape(h, w * 4)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 6, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
+
+class SvgBuilder:
+    """Accumulates SVG elements in a single buffer and joins them once at the end"""
+
+    def __init__(self, width: float, height: float, **attrs):
+        self.width = width
+        self.height = height
+        self._parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+            f'width="{width}pt" height="{height}pt" '
+            f'viewBox="0 0 {width} {height}" version="1.1"{_attrs(attrs)}>'
+        ]
+
+    def rect(self, x: float, y: float, w: float, h: float, **attrs):
+        self._parts.append(
+            f'<rect x="{x:.2f}" y="{y:.2f}" width="{w:.2f}" height="{h:.2f}"{_attrs(attrs)}/>'
+        )
+
+    def line(self, x1: float, y1: float, x2: float, y2: float, **attrs):
+        self._parts.append(
+            f'<line x1="{x1:.2f}" y1="{y1:.2f}" x2="{x2:.2f}" y2="{y2:.2f}"{_attrs(attrs)}/>'
+        )
+
+    def polyline(self, xs, ys, **attrs):
+        self._parts.append(f'<polyline points="{fmt_points(xs, ys)}"{_attrs(attrs)}/>')
+
+    def circle(self, cx: float, cy: float, r: float, **attrs):
+        self._parts.append(f'<circle cx="{cx:.2f}" cy="{cy:.2f}" r="{r:.2f}"{_attrs(attrs)}/>')
+
+    def circles(self, cxs, cys, r: float):
+        """Emit one circle per point in a single pass over the coordinate arrays"""
+        rs = f"{r:.2f}"
+        cxs = np.asarray(cxs, dtype=np.float64).tolist()
+        cys = np.asarray(cys, dtype=np.float64).tolist()
+        self._parts.append("".join([f'<circle cx="{x:.2f}" cy="{y:.2f}" r="{rs}"/>' for x, y in zip(cxs, cys)]))
+
+    def dots(self, cxs, cys, r: float, **attrs):
+        """Emit many equal dots as one <path> of zero-length, round-capped strokes.
+
+        About a third of the markup of one <circle> per point and a single
+        node. Overlapping dots are painted once, so use it for opaque dots only.
+        """
+        xs = np.asarray(cxs, dtype=np.float64).tolist()
+        ys = np.asarray(cys, dtype=np.float64).tolist()
+        d = "".join([f"M{x:.2f},{y:.2f}h0" for x, y in zip(xs, ys)])
+        self.path(d, fill="none", stroke_width=fmt(2 * r), stroke_linecap="round", **attrs)
+
+    def text(self, x: float, y: float, content: str, **attrs):
+        self._parts.append(f'<text x="{x:.2f}" y="{y:.2f}"{_attrs(attrs)}>{escape(str(content))}</text>')
+
+    def path(self, d: str, **attrs):
+        self._parts.append(f'<path d="{d}"{_attrs(attrs)}/>')
+
+    def image(self, x: float, y: float, w: float, h: float, png: bytes, **attrs):
+        """Embed PNG bytes as a data URI, stretched to the given box"""
+        data = base64.b64encode(png).decode("ascii")
+        self._parts.append(
+            f'<image x="{x:.2f}" y="{y:.2f}" width="{w:.2f}" height="{h:.2f}" preserveAspectRatio="none"'
+            f'{_attrs(attrs)} xlink:href="data:image/png;base64,{data}"/>'
+        )
+
+    def raw(self, markup: str):
+        """Append prebuilt markup as-is"""
+        self._parts.append(markup)
+
+    def open_group(self, **attrs):
+        self._parts.append(f"<g{_attrs(attrs)}>")
+
+    def close_group(self):
+        self._parts.append("</g>")
+
+    def write_to(self, f):
+        """Write the complete document to a text file without joining it first"""
+        f.writelines(self._parts)
+        f.write("</svg>")
+
+    def getvalue(self) -> str:
+        """Return the complete document"""
+        return "".join(self._parts) + "</svg>"
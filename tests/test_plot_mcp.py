@@ -0,0 +1,207 @@
+import os
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+import numpy as np
+from pydantic import ValidationError
+
+from plot_mcp.main import _cache_key
+from plot_mcp.models import (
+    AreaParams, BarParams, BoxParams, ContourParams, HeatmapParams,
+    HistogramParams, LineParams, PieParams, ScatterParams,
+)
+from plot_mcp.renderer import (
+    _finite_runs, _lttb, _nice_ticks,
+    render_area, render_bar, render_box, render_contour, render_heatmap,
+    render_histogram, render_line, render_pie, render_scatter,
+)
+
+SVG_NS = "{http://www.w3.org/2000/svg}"
+nan = float("nan")
+
+
+class LttbTest(unittest.TestCase):
+    def test_short_input_is_returned_unchanged(self):
+        x, y = np.arange(10.0), np.arange(10.0) ** 2
+        ox, oy = _lttb(x, y, 10)
+        self.assertIs(ox, x)
+        self.assertIs(oy, y)
+
+    def test_keeps_endpoints_and_order(self):
+        x = np.linspace(0, 10, 5000)
+        y = np.sin(x)
+        ox, oy = _lttb(x, y, 200)
+        self.assertEqual(ox.size, 200)
+        self.assertEqual((ox[0], ox[-1]), (x[0], x[-1]))
+        self.assertTrue(np.all(np.diff(ox) > 0))
+        # Output points are a subset of the input
+        self.assertTrue(np.isin(ox, x).all())
+
+    def test_keeps_spikes(self):
+        x = np.arange(1000.0)
+        y = np.zeros(1000)
+        y[437] = 50.0
+        y[812] = -20.0
+        ox, oy = _lttb(x, y, 50)
+        self.assertIn(437.0, ox)
+        self.assertIn(812.0, ox)
+        self.assertEqual(oy.max(), 50.0)
+        self.assertEqual(oy.min(), -20.0)
+
+
+class NiceTicksTest(unittest.TestCase):
+    def test_whole_number_steps_have_no_decimals(self):
+        ticks, labels = _nice_ticks(0, 125)
+        self.assertEqual(labels, ["0", "25", "50", "75", "100", "125"])
+        np.testing.assert_allclose(ticks, [0, 25, 50, 75, 100, 125])
+
+    def test_fractional_steps(self):
+        self.assertEqual(_nice_ticks(0, 1.2)[1], ["0.0", "0.2", "0.4", "0.6", "0.8", "1.0", "1.2"])
+        self.assertEqual(_nice_ticks(0, 0.13)[1], ["0.000", "0.025", "0.050", "0.075", "0.100", "0.125"])
+
+    def test_ticks_stay_inside_range(self):
+        for lo, hi in [(-3.7, 12.2), (0.001, 0.0093), (-1e6, 3e6), (95, 105)]:
+            ticks, labels = _nice_ticks(lo, hi)
+            self.assertEqual(len(ticks), len(labels))
+            self.assertTrue(2 <= len(ticks) <= 7)
+            self.assertTrue(np.all(ticks >= lo - 1e-9 * abs(hi - lo)))
+            self.assertTrue(np.all(ticks <= hi + 1e-9 * abs(hi - lo)))
+
+    def test_zero_is_not_negative(self):
+        _, labels = _nice_ticks(-0.3, 0.3)
+        self.assertIn("0.0", labels)
+        self.assertNotIn("-0.0", labels)
+
+
+class FiniteRunsTest(unittest.TestCase):
+    def test_all_finite_is_one_run(self):
+        x, y = np.arange(5.0), np.arange(5.0)
+        runs = _finite_runs(x, y)
+        self.assertEqual(len(runs), 1)
+        self.assertIs(runs[0][0], x)
+
+    def test_splits_at_non_finite_points(self):
+        x = np.array([0, 1, 2, 3, 4, 5, 6], dtype=float)
+        y = np.array([nan, 1, 2, nan, 4, 5, np.inf])
+        runs = _finite_runs(x, y)
+        self.assertEqual([r[0].tolist() for r in runs], [[1, 2], [4, 5]])
+        self.assertEqual([r[1].tolist() for r in runs], [[1, 2], [4, 5]])
+
+    def test_non_finite_x_also_splits(self):
+        x = np.array([0, nan, 2, 3], dtype=float)
+        runs = _finite_runs(x, np.ones(4))
+        self.assertEqual([r[0].tolist() for r in runs], [[0], [2, 3]])
+
+    def test_all_non_finite_is_empty(self):
+        self.assertEqual(_finite_runs(np.full(3, nan), np.ones(3)), [])
+
+
+class ArrayFieldTest(unittest.TestCase):
+    def test_vector_becomes_float_array(self):
+        p = AreaParams(x=[1, 2, 3], y=[4, 5.5, 6])
+        self.assertIsInstance(p.x, np.ndarray)
+        self.assertEqual(p.x.dtype, np.float64)
+        self.assertEqual(p.y.tolist(), [4, 5.5, 6])
+
+    def test_rejects_null_and_non_numbers(self):
+        for bad in ([1, None], [1, {"a": 1}], [1, "x"], [[1, 2]], 5):
+            with self.subTest(bad=bad), self.assertRaises(ValidationError):
+                AreaParams(x=bad, y=[1, 2])
+
+    def test_accepts_nan(self):
+        p = AreaParams(x=[1, 2], y=[nan, 1])
+        self.assertTrue(np.isnan(p.y[0]))
+
+    def test_strided_array_is_made_contiguous(self):
+        a = np.arange(20.0)
+        p = AreaParams(x=a[::2], y=a[1::2])
+        self.assertTrue(p.x.flags.c_contiguous)
+        self.assertEqual(p.x.tolist(), a[::2].tolist())
+
+    def test_matrix(self):
+        p = ContourParams(x=[0, 1, 2], y=[0, 1], z=[[1, 2, 3], [4, 5, 6]])
+        self.assertEqual(p.z.shape, (2, 3))
+        for bad in ([[1, 2], [3]], [1, 2], [[1, None], [2, 3]]):
+            with self.subTest(bad=bad), self.assertRaises(ValidationError):
+                ContourParams(x=[0, 1], y=[0, 1], z=bad)
+
+    def test_json_dump_is_lists(self):
+        p = AreaParams(x=[1, 2], y=[3, 4])
+        self.assertEqual(p.model_dump(mode="json")["x"], [1.0, 2.0])
+
+
+class CacheKeyTest(unittest.TestCase):
+    def test_same_params_same_key(self):
+        a = BarParams(categories=["a", "b"], values=[1, 2], title="Sales")
+        b = BarParams(categories=["a", "b"], values=[1, 2], title="Sales")
+        self.assertEqual(_cache_key("bar", a), _cache_key("bar", b))
+
+    def test_data_and_tool_change_the_key(self):
+        a = BarParams(categories=["a", "b"], values=[1, 2], title="Sales")
+        b = BarParams(categories=["a", "b"], values=[9, 1], title="Sales")
+        self.assertNotEqual(_cache_key("bar", a), _cache_key("bar", b))
+        self.assertNotEqual(_cache_key("bar", a), _cache_key("line", a))
+
+    def test_array_and_list_inputs_match(self):
+        a = AreaParams(x=[1, 2, 3], y=[4, 5, 6])
+        b = AreaParams(x=np.array([1.0, 2.0, 3.0]), y=np.arange(4.0, 7.0)[::1])
+        self.assertEqual(_cache_key("area", a), _cache_key("area", b))
+
+    def test_strided_array(self):
+        a = np.arange(10.0)
+        _cache_key("area", AreaParams(x=a[::2], y=a[1::2]))
+
+
+class RenderTest(unittest.TestCase):
+    """Every plot type renders a well-formed SVG document, including awkward inputs"""
+
+    cases = [
+        ("line", render_line, lambda: LineParams(series=[
+            {"name": "a", "x": [1, 2, 3, 4], "y": [1, nan, 3, 2]},
+            {"name": "b", "x": [1, 2, 3, 4], "y": [2, 2, 1, 0]},
+        ], title="T <&> \"q\"")),
+        ("line long", render_line, lambda: LineParams(series=[
+            {"name": "a", "x": np.arange(50000.0), "y": np.sin(np.arange(50000.0) / 100)},
+        ])),
+        ("scatter", render_scatter, lambda: ScatterParams(x=[1, 2, 3], y=[3, nan, 1])),
+        ("bar", render_bar, lambda: BarParams(categories=["a", "b", "c"], values=[1, -2, 3])),
+        ("bar horizontal", render_bar, lambda: BarParams(categories=["a", "b"], values=[1, 2], orientation="horizontal")),
+        ("area", render_area, lambda: AreaParams(x=[1, 2, 3, 4], y=[1, nan, 3, 2])),
+        ("histogram", render_histogram, lambda: HistogramParams(values=np.random.default_rng(0).normal(size=500).tolist())),
+        ("box", render_box, lambda: BoxParams(groups=[{"name": "a", "values": [1, 2, 3, 40]}, {"name": "b", "values": [2, 3]}])),
+        ("heatmap", render_heatmap, lambda: HeatmapParams(matrix=[[1, 2], [3, nan]], x_labels=["a", "b"], y_labels=["c", "d"], show_values=True)),
+        ("heatmap all nan", render_heatmap, lambda: HeatmapParams(matrix=[[nan, nan]], x_labels=["a", "b"], y_labels=["c"])),
+        ("contour", render_contour, lambda: ContourParams(
+            x=np.linspace(-2, 2, 20), y=np.linspace(-1, 1, 10),
+            z=np.exp(-np.add.outer(np.linspace(-1, 1, 10) ** 2, np.linspace(-2, 2, 20) ** 2)))),
+        ("contour all nan", render_contour, lambda: ContourParams(x=[1, 2], y=[1, 2], z=[[nan, nan], [nan, nan]])),
+        ("pie", render_pie, lambda: PieParams(labels=["a", "b", "c"], values=[1, 2, 0], inner_radius_ratio=0.4)),
+    ]
+
+    def _check_svg(self, root, params):
+        self.assertEqual(root.tag, f"{SVG_NS}svg")
+        self.assertEqual(root.get("viewBox"), f"0 0 {params.width:g} {params.height:g}")
+
+    def test_inline(self):
+        for name, render, make in self.cases:
+            with self.subTest(name):
+                params = make()
+                out = render(params)
+                self.assertIsNone(out.svg_path)
+                self._check_svg(ET.fromstring(out.svg), params)
+
+    def test_to_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, render, make in self.cases:
+                with self.subTest(name):
+                    params = make()
+                    path = os.path.join(tmp, name.replace(" ", "_") + ".svg")
+                    out = render(params, path)
+                    self.assertIsNone(out.svg)
+                    self.assertEqual(out.svg_path, path)
+                    self._check_svg(ET.parse(path).getroot(), params)
+
+
+if __name__ == "__main__":
+    unittest.main()